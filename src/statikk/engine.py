@@ -1,12 +1,17 @@
+import functools
 import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Any, Dict, Type, Optional, List, Union
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Type, Optional, List, Union, get_args
 
 import boto3
 from botocore.config import Config
 from pydantic.fields import FieldInfo
 from boto3.dynamodb.conditions import ComparisonCondition, Key
-from boto3.dynamodb.types import TypeDeserializer, Decimal
+from boto3.dynamodb.types import Decimal
 
 from statikk.conditions import Condition, Equals, BeginsWith
 from statikk.expressions import UpdateExpressionBuilder
@@ -14,8 +19,6 @@ from statikk.models import (
     DatabaseModel,
     GSI,
     Index,
-    IndexPrimaryKeyField,
-    IndexSecondaryKeyField,
     KeySchema,
 )
 
@@ -24,6 +27,16 @@ from aws_xray_sdk.core import patch_all
 
 patch_all()
 
+# Values of these exact types are passed to boto3 as they are, so lists made up of them need no per-item serialization.
+_SCALAR_TYPES = frozenset({str, int, bool, Decimal, type(None)})
+
+# BatchWriteItem accepts at most 25 write requests per call.
+_BATCH_WRITE_SIZE = 25
+_BATCH_GET_SIZE = 100
+_BATCH_BASE_BACKOFF_SECONDS = 0.05
+_BATCH_MAX_BACKOFF_SECONDS = 5.0
+
+
 class InvalidIndexNameError(Exception):
     pass
 
@@ -42,47 +55,54 @@ class Table:
         name: str,
         models: List[Type[DatabaseModel]],
         key_schema: KeySchema,
-        indexes: List[GSI] = Optional[None],
+        indexes: Optional[List[GSI]] = None,
         delimiter: str = "|",
         billing_mode: str = "PAY_PER_REQUEST",
+        session: Optional[boto3.session.Session] = None,
     ):
         self.name = name
         self.key_schema = key_schema
         self.indexes = indexes or []
+        self._indexes_by_name = {idx.name: idx for idx in self.indexes}
         self.delimiter = delimiter
         self.models = models
         self.billing_mode = billing_mode
-        for idx in self.indexes:
-            for model in self.models:
+        for model in self.models:
+            model.set_table_ref(self)
+            for idx in self.indexes:
                 self._set_index_fields(model, idx)
-                model.set_table_ref(self)
-                if "type" not in model.model_fields:
-                    model.model_fields["type"] = FieldInfo(annotation=str, default=model.model_type(), required=False)
-        self._client = None
+            if self.indexes and "type" not in model.model_fields:
+                model.model_fields["type"] = FieldInfo(annotation=str, default=model.model_type(), required=False)
+            model.model_rebuild(force=True)
+        self.session = session
         self._dynamodb_table = None
+        # Guards building the boto3 resource, so that concurrent first calls from several threads share one.
+        self._dynamodb_table_lock = threading.Lock()
+        self._deserializers: Dict[Type[DatabaseModel], Dict[str, Optional[Callable[[Any], Any]]]] = {}
+        self._construct_requirements: Dict[Type[DatabaseModel], Optional[FrozenSet[str]]] = {}
 
     def _dynamodb_client(self):
-        if self._client:
-            return self._client
-
-        self._client = boto3.client(
-            "dynamodb",
-            config=Config(region_name=os.environ.get("AWS_DEFAULT_REGION", "eu-west-1")),
-        )
-
-        return self._client
+        return self._get_dynamodb_table().meta.client
 
     def _get_dynamodb_table(self):
         if self._dynamodb_table:
             return self._dynamodb_table
-
-        dynamodb = boto3.resource(
-            "dynamodb",
-            config=Config(region_name=os.environ.get("AWS_DEFAULT_REGION", "eu-west-1")),
-        )
-        self._dynamodb_table = dynamodb.Table(self.name)
+        with self._dynamodb_table_lock:
+            if not self._dynamodb_table:
+                self._dynamodb_table = self._build_dynamodb_table()
         return self._dynamodb_table
 
+    def _build_dynamodb_table(self):
+        if self.session and self.session.region_name:
+            # The session's own region applies; a Config region would silently take precedence over it.
+            dynamodb = self.session.resource("dynamodb")
+        else:
+            dynamodb = (self.session or boto3).resource(
+                "dynamodb",
+                config=Config(region_name=os.environ.get("AWS_DEFAULT_REGION", "eu-west-1")),
+            )
+        return dynamodb.Table(self.name)
+
     def _to_dynamodb_type(self, type: Any):
         if type is str:
             return "S"
@@ -150,15 +170,17 @@ class Table:
         key_schema = [{"AttributeName": self.key_schema.hash_key, "KeyType": "HASH"}]
         if self.key_schema.sort_key:
             key_schema.append({"AttributeName": self.key_schema.sort_key, "KeyType": "RANGE"})
-        self._dynamodb_client().create_table(
+        table_definition = dict(
             TableName=self.name,
             KeySchema=key_schema,
             AttributeDefinitions=[{"AttributeName": self.key_schema.hash_key, "AttributeType": "S"}]
             + hash_key_attribute_definitions
             + sort_key_attribute_definitions,
-            GlobalSecondaryIndexes=global_secondary_indexes,
             BillingMode=self.billing_mode,
         )
+        if global_secondary_indexes:
+            table_definition["GlobalSecondaryIndexes"] = global_secondary_indexes
+        self._dynamodb_client().create_table(**table_definition)
 
     def delete(self):
         """Deletes the DynamoDB table."""
@@ -170,7 +192,7 @@ class Table:
         :param id: The id of the item to delete.
         """
         key = {self.key_schema.hash_key: id}
-        self._get_dynamodb_table().delete_item(Key=key)
+        self._dynamodb_client().delete_item(TableName=self.name, Key=key)
 
     def get_item(
         self,
@@ -188,13 +210,10 @@ class Table:
         key = {self.key_schema.hash_key: id}
         if sort_key:
             key[self.key_schema.sort_key] = self._serialize_value(sort_key)
-        raw_data = self._get_dynamodb_table().get_item(Key=key, ConsistentRead=consistent_read)
+        raw_data = self._dynamodb_client().get_item(TableName=self.name, Key=key, ConsistentRead=consistent_read)
         if "Item" not in raw_data:
             raise ItemNotFoundError(f"{model_class} with id '{id}' not found.")
-        data = raw_data["Item"]
-        for key, value in data.items():
-            data[key] = self._deserialize_value(value, model_class.model_fields[key])
-        return model_class(**data)
+        return self._deserialize_item(raw_data["Item"], model_class=model_class)
 
     def put_item(self, model: DatabaseModel) -> DatabaseModel:
         """
@@ -226,10 +245,21 @@ class Table:
         Returns the enriched database model instance.
         """
         data = self._serialize_item(model)
-        self._get_dynamodb_table().put_item(Item=data)
-        for key, value in data.items():
-            data[key] = self._deserialize_value(value, model.model_fields[key])
-        return type(model)(**data)
+        self._dynamodb_client().put_item(TableName=self.name, Item=data)
+        return self._deserialize_item(data, model_class=type(model))
+
+    def put_items(self, models: Iterable[DatabaseModel], pool_size: int = 4):
+        """
+        Puts multiple items into the database using batch writes, in as few requests as possible.
+
+        Index fields are constructed the same way as for put_item and are set on the provided model instances, but unlike
+        put_item, the stored items are not returned.
+
+        :param models: The models to put into the database.
+        :param pool_size: The number of batches of 25 items that are sent to DynamoDB concurrently.
+        """
+        with self.batch_write(pool_size=pool_size) as batch:
+            batch.put_all(models)
 
     def update_item(
         self,
@@ -252,22 +282,22 @@ class Table:
             for prefixed_attribute, value in expression_attribute_values.items():
                 expression_attribute_values[prefixed_attribute] = self._serialize_value(value)
                 attribute = prefixed_attribute.replace(":", "")
-                if model.model_fields[attribute].annotation is IndexSecondaryKeyField:
+                if attribute in model._sort_key_field_names:
                     idx_field = getattr(model, attribute)
-                    for idx in idx_field.index_names:
-                        idx_field.value = value
-                        changed_index_values.add(idx)
+                    idx_field.value = value
+                    changed_index_values.update(idx_field.index_names)
             return changed_index_values
 
         changed_index_values = _find_changed_indexes()
 
         for idx_name in changed_index_values:
-            idx = [idx for idx in self.indexes if idx.name == idx_name][0]
+            idx = self._indexes_by_name[idx_name]
             index_value = self._get_sort_key_value(model, idx)
             expression_attribute_values[f":{idx.sort_key.name}"] = index_value
             update_expression += f" SET {idx.sort_key.name} = :{idx.sort_key.name}"
 
         request = {
+            "TableName": self.name,
             "Key": key,
             "UpdateExpression": update_expression,
             "ExpressionAttributeValues": expression_attribute_values,
@@ -276,18 +306,17 @@ class Table:
         if expression_attribute_names:
             request["ExpressionAttributeNames"] = expression_attribute_names
 
-        response = self._get_dynamodb_table().update_item(**request)
-        data = response["Attributes"]
-        for key, value in data.items():
-            data[key] = self._deserialize_value(value, model.model_fields[key])
-        return type(model)(**data)
+        response = self._dynamodb_client().update_item(**request)
+        return self._deserialize_item(response["Attributes"], model_class=type(model))
 
-    def batch_write(self):
+    def batch_write(self, pool_size: int = 4):
         """
         Returns a context manager for batch writing items to the database. This method handles all the buffering of the
         batch operation and the construction of index fields for each item.
+
+        :param pool_size: The number of batches of 25 items that are sent to DynamoDB concurrently.
         """
-        return BatchWriteContext(self)
+        return BatchWriteContext(self, pool_size=pool_size)
 
     def query_index(
         self,
@@ -308,14 +337,55 @@ class Table:
         :param filter_condition: An optional filter condition to use for the query. See boto3.dynamodb.conditions.ComparisonCondition for more information.
         :param index_name: The name of the index to use for the query. If not provided, the first index configured on the table is used.
         """
+        query_params = self._build_query_params(hash_key, model_class, range_key, filter_condition, index_name)
+        last_evaluated_key = True
+
+        while last_evaluated_key:
+            items = self._dynamodb_client().query(**query_params)
+            for item in items["Items"]:
+                yield self._deserialize_item(item, model_class=model_class)
+            last_evaluated_key = items.get("LastEvaluatedKey", False)
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+
+    def count_index(
+        self,
+        hash_key: Union[Condition | str],
+        model_class: Type[DatabaseModel],
+        range_key: Optional[Condition] = None,
+        filter_condition: Optional[ComparisonCondition] = None,
+        index_name: Optional[str] = None,
+    ) -> int:
+        """
+        Counts the items query_index would return for the same arguments. Only the number of matching items is sent back
+        by DynamoDB, the items themselves are neither transferred nor deserialized.
+        """
+        query_params = self._build_query_params(hash_key, model_class, range_key, filter_condition, index_name)
+        query_params["Select"] = "COUNT"
+        count = 0
+        last_evaluated_key = True
+
+        while last_evaluated_key:
+            response = self._dynamodb_client().query(**query_params)
+            count += response["Count"]
+            last_evaluated_key = response.get("LastEvaluatedKey", False)
+            query_params["ExclusiveStartKey"] = last_evaluated_key
+        return count
+
+    def _build_query_params(
+        self,
+        hash_key: Union[Condition | str],
+        model_class: Type[DatabaseModel],
+        range_key: Optional[Condition],
+        filter_condition: Optional[ComparisonCondition],
+        index_name: Optional[str],
+    ) -> Dict[str, Any]:
         if isinstance(hash_key, str):
             hash_key = Equals(hash_key)
         if not index_name:
             index_name = self.indexes[0].name
-        index_filter = [idx for idx in self.indexes if idx.name == index_name]
-        if not index_filter:
+        index = self._indexes_by_name.get(index_name)
+        if index is None:
             raise InvalidIndexNameError(f"The provided index name '{index_name}' is not configured on the table.")
-        index = index_filter[0]
         key_condition = hash_key.evaluate(index.hash_key.name)
         if range_key is None and model_class.include_type_in_sort_key():
             range_key = BeginsWith(model_class.model_type())
@@ -324,17 +394,13 @@ class Table:
             key_condition = key_condition & range_key.evaluate(index.sort_key.name)
 
         query_params = {
+            "TableName": self.name,
             "IndexName": index_name,
             "KeyConditionExpression": key_condition,
         }
         if filter_condition:
             query_params["FilterExpression"] = filter_condition
-        last_evaluated_key = True
-
-        while last_evaluated_key:
-            items = self._get_dynamodb_table().query(**query_params)
-            yield from [self._deserialize_item(item, model_class=model_class) for item in items["Items"]]
-            last_evaluated_key = items.get("LastEvaluatedKey", False)
+        return query_params
 
     def scan(
         self,
@@ -350,6 +416,7 @@ class Table:
         :param filter_condition: An optional filter condition to use for the query. See boto3.dynamodb.conditions.ComparisonCondition for more information.
         """
         query_params = {
+            "TableName": self.name,
             "ConsistentRead": consistent_read,
         }
         if filter_condition:
@@ -357,45 +424,46 @@ class Table:
         last_evaluated_key = True
 
         while last_evaluated_key:
-            items = self._get_dynamodb_table().scan(**query_params)
-            yield from [model_class(**item) for item in items["Items"]]
+            items = self._dynamodb_client().scan(**query_params)
+            for item in items["Items"]:
+                yield self._deserialize_item(item, model_class=model_class)
             last_evaluated_key = items.get("LastEvaluatedKey", False)
-
-    def _convert_dynamodb_to_python(self, item) -> Dict[str, Any]:
-        deserializer = TypeDeserializer()
-        return {k: deserializer.deserialize(v) for k, v in item.items()}
+            query_params["ExclusiveStartKey"] = last_evaluated_key
 
     def batch_get_items(
-        self, ids: List[str], model_class: Type[DatabaseModel], batch_size: int = 100
+        self, ids: List[str], model_class: Type[DatabaseModel], batch_size: int = _BATCH_GET_SIZE, pool_size: int = 4
     ) -> List[DatabaseModel]:
-        dynamodb = self._dynamodb_client()
-
+        """
+        Fetches the items with the given ids. The ids are split into batches of ``batch_size`` which are requested
+        concurrently, at most ``pool_size`` at a time; the results are returned in batch order.
+        """
+        client = self._dynamodb_client()
         id_batches = [ids[i : i + batch_size] for i in range(0, len(ids), batch_size)]
+        if not id_batches:
+            return []
 
-        results = []
-
-        for batch in id_batches:
-            request_items = {
-                self.name: {
-                    "Keys": [{"id": {"S": id}} for id in batch],
-                }
-            }
+        with ThreadPoolExecutor(max_workers=min(pool_size, len(id_batches))) as executor:
+            get_batch = _bind_trace_entity(lambda batch: self._get_batch(client, batch))
+            item_batches = list(executor.map(get_batch, id_batches))
 
-            while request_items:
-                response = dynamodb.batch_get_item(RequestItems=request_items)
+        return [self._deserialize_item(item, model_class=model_class) for items in item_batches for item in items]
 
-                if "UnprocessedKeys" in response and response["UnprocessedKeys"]:
-                    request_items = response["UnprocessedKeys"][self.name]
-                else:
-                    results.extend(
-                        [
-                            model_class(**self._convert_dynamodb_to_python(item))
-                            for item in response["Responses"][self.name]
-                        ]
-                    )
-                    break
-
-        return results
+    def _get_batch(self, client, ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Sends a single BatchGetItem request and re-requests whatever keys DynamoDB reports back as unprocessed, backing
+        off exponentially with jitter between attempts. Returns the raw items of every response.
+        """
+        items = []
+        request_items = {self.name: {"Keys": [{self.key_schema.hash_key: id} for id in ids]}}
+        attempt = 0
+        while request_items:
+            response = client.batch_get_item(RequestItems=request_items)
+            items.extend(response.get("Responses", {}).get(self.name, []))
+            request_items = response.get("UnprocessedKeys")
+            if request_items:
+                _backoff(attempt)
+                attempt += 1
+        return items
 
     def _prepare_model_data(
         self,
@@ -404,13 +472,18 @@ class Table:
         force_override_index_fields: bool = False,
     ) -> Dict[str, Any]:
         for idx in indexes:
+            if (
+                not force_override_index_fields
+                and getattr(item, idx.hash_key.name, None) is not None
+                and getattr(item, idx.sort_key.name, None) is not None
+            ):
+                continue
             index_fields = self._compose_index_values(item, idx)
             for key, value in index_fields.items():
                 if hasattr(item, key) and (getattr(item, key) is not None and not force_override_index_fields):
                     continue
                 if value is not None:
                     setattr(item, key, value)
-        item.model_rebuild(force=True)
         return item.model_dump()
 
     def _serialize_item(self, item: DatabaseModel):
@@ -420,16 +493,63 @@ class Table:
         return data
 
     def _deserialize_item(self, item: Dict[str, Any], model_class: Type[DatabaseModel]):
+        deserializers = self._field_deserializers(model_class)
         for key, value in item.items():
-            item[key] = self._deserialize_value(value, model_class.model_fields[key])
+            deserialize = deserializers[key]
+            if deserialize is not None:
+                item[key] = deserialize(value)
+        if self._is_constructible(item, model_class):
+            return model_class.from_db(item)
         return model_class(**item)
 
-    def _deserialize_value(self, value: Any, annotation: Any):
-        if annotation is datetime or "datetime" in str(annotation):
-            return datetime.fromtimestamp(int(value))
+    def _is_constructible(self, item: Dict[str, Any], model_class: Type[DatabaseModel]) -> bool:
+        """
+        Items read back from the table were validated when they were written, so they can be turned into models without
+        validating them again, as long as they are complete and DynamoDB hands back every field in its final type. That
+        only holds for string and index fields: numbers come back as Decimal and nested models as dicts, so models with
+        other field types, with validators of their own or with constrained fields (Field(max_length=...),
+        Annotated[str, AfterValidator(...)], ...) are still validated.
+        """
+        if model_class not in self._construct_requirements:
+            constructible = not model_class._has_custom_validators and all(
+                not field_info.metadata
+                and (field_info.annotation is str or model_class._is_index_field(field_info))
+                for field_info in model_class.model_fields.values()
+            )
+            self._construct_requirements[model_class] = (
+                frozenset(
+                    field_name for field_name, field_info in model_class.model_fields.items() if field_info.is_required()
+                )
+                if constructible
+                else None
+            )
+        required_fields = self._construct_requirements[model_class]
+        return required_fields is not None and item.keys() >= required_fields
+
+    def _field_deserializers(self, model_class: Type[DatabaseModel]) -> Dict[str, Optional[Callable[[Any], Any]]]:
+        """
+        Returns the deserializer of every field of the model class, keyed by field name. Fields stored as they are
+        map to None. The deserializer of a field never changes, so it is resolved once per model class.
+        """
+        deserializers = self._deserializers.get(model_class)
+        if deserializers is None:
+            deserializers = {
+                field_name: self._deserializer_for(field_info.annotation)
+                for field_name, field_info in model_class.model_fields.items()
+            }
+            self._deserializers[model_class] = deserializers
+        return deserializers
+
+    def _deserializer_for(self, annotation: Any) -> Optional[Callable[[Any], Any]]:
+        args = get_args(annotation)
+        if len(args) == 2 and type(None) in args:
+            # Optional[X] values are stored like X values, or not at all.
+            annotation = args[0] if args[1] is type(None) else args[1]
+        if annotation is datetime:
+            return lambda value: None if value is None else datetime.fromtimestamp(int(value))
         if annotation is float:
-            return float(value)
-        return value
+            return lambda value: None if value is None else float(value)
+        return None
 
     def _serialize_value(self, value: Any):
         if isinstance(value, datetime):
@@ -437,6 +557,8 @@ class Table:
         if isinstance(value, float):
             return Decimal(value)
         if isinstance(value, list):
+            if all(type(item) in _SCALAR_TYPES for item in value):
+                return value
             return [self._serialize_value(item) for item in value]
         if isinstance(value, dict):
             return {key: self._serialize_value(item) for key, item in value.items() if item is not None}
@@ -452,20 +574,19 @@ class Table:
     def _get_sort_key_value(self, model: DatabaseModel, idx: GSI) -> str:
         sort_key_fields_unordered = [
             (field_name, getattr(model, field_name).order)
-            for field_name, field_info in model.model_fields.items()
-            if field_info.annotation is not None
-            if field_info.annotation is IndexSecondaryKeyField and idx.name in getattr(model, field_name).index_names
+            for field_name in model._sort_key_field_names
+            if idx.name in getattr(model, field_name).index_names
         ]
 
-        if len(sort_key_fields_unordered) == idx.sort_key is not None:
+        if len(sort_key_fields_unordered) == 0:
+            if model.include_type_in_sort_key():
+                return model.model_type()
             raise IncorrectSortKeyError(f"Model {model.__class__} does not have a sort key defined.")
         if sort_key_fields_unordered[0][1] is not None:
             sort_key_fields_unordered.sort(key=lambda x: x[1])
 
         sort_key_fields = [field[0] for field in sort_key_fields_unordered]
 
-        if len(sort_key_fields) == 0 and model.include_type_in_sort_key():
-            return model.model_type()
         if idx.sort_key.type is not str:
             value = getattr(model, sort_key_fields[0]).value
             if type(value) is not idx.sort_key.type:
@@ -479,7 +600,7 @@ class Table:
             return self._serialize_value(value)
 
         sort_key_values: List[str] = []
-        if model.include_type_in_sort_key() and model.model_type() not in sort_key_values:
+        if model.include_type_in_sort_key():
             sort_key_values.append(model.model_type())
 
         for field in sort_key_fields:
@@ -488,12 +609,8 @@ class Table:
         return self.delimiter.join(sort_key_values)
 
     def _compose_index_values(self, model: DatabaseModel, idx: GSI) -> Dict[str, Any]:
-        model_fields = model.model_fields
         hash_key_field = [
-            field_name
-            for field_name, field_info in model_fields.items()
-            if field_info.annotation is not None
-            if field_info.annotation is IndexPrimaryKeyField and idx.name in getattr(model, field_name).index_names
+            field_name for field_name in model._hash_key_field_names if idx.name in getattr(model, field_name).index_names
         ]
         if len(hash_key_field) == 0 and model.type_is_primary_key():
             hash_key_field.append(model.model_type())
@@ -510,34 +627,87 @@ class Table:
             idx.sort_key.name: self._get_sort_key_value(model, idx),
         }
 
-    def _perform_batch_write(self, put_items: List[DatabaseModel], delete_items: List[DatabaseModel]):
+    def _perform_batch_write(
+        self, put_items: List[DatabaseModel], delete_items: List[DatabaseModel], pool_size: int = 4
+    ):
         if len(put_items) == 0 and len(delete_items) == 0:
             return
 
-        dynamodb_table = self._get_dynamodb_table()
+        # Batches are sent concurrently, so an item put twice could otherwise end up with either version. Like a
+        # sequential write, the last queued version of an item wins.
+        key_names = [self.key_schema.hash_key]
+        if self.key_schema.sort_key:
+            key_names.append(self.key_schema.sort_key)
+        items_by_key = {}
+        for item in put_items:
+            data = self._serialize_item(item)
+            items_by_key[tuple(data[key_name] for key_name in key_names)] = data
+        put_requests = [{"PutRequest": {"Item": data}} for data in items_by_key.values()]
+        delete_ids = dict.fromkeys(item.id for item in delete_items)
+        delete_requests = [{"DeleteRequest": {"Key": {self.key_schema.hash_key: id}}} for id in delete_ids]
+        client = self._dynamodb_client()
+
+        write_batch = _bind_trace_entity(lambda batch: self._write_batch(client, batch))
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            # Deletes are only sent once every put went through, so deleting an item put in the same batch wins.
+            for requests in (put_requests, delete_requests):
+                batches = [requests[i : i + _BATCH_WRITE_SIZE] for i in range(0, len(requests), _BATCH_WRITE_SIZE)]
+                list(executor.map(write_batch, batches))
+
+    def _write_batch(self, client, requests: List[Dict[str, Any]]):
+        """
+        Sends a single BatchWriteItem request and resends whatever DynamoDB reports back as unprocessed, backing off
+        exponentially with jitter between attempts, until every request went through.
+        """
+        attempt = 0
+        while requests:
+            response = client.batch_write_item(RequestItems={self.name: requests})
+            requests = response.get("UnprocessedItems", {}).get(self.name, [])
+            if requests:
+                _backoff(attempt)
+                attempt += 1
+
 
-        if len(put_items) > 0:
-            with dynamodb_table.batch_writer() as batch:
-                for item in put_items:
-                    data = self._serialize_item(item)
-                    batch.put_item(Item=data)
+def _bind_trace_entity(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    X-Ray keeps the current segment per thread, so DynamoDB calls made from worker threads would not find the caller's
+    segment. Binds func to the trace entity of the calling thread, so that it can run on any thread.
+    """
+    entity = xray_recorder.get_trace_entity()
+    if entity is None:
+        return func
 
-        if len(delete_items) > 0:
-            with dynamodb_table.batch_writer() as batch:
-                for item in delete_items:
-                    data = self._serialize_item(item)
-                    batch.delete_item(Key=data)
+    @functools.wraps(func)
+    def _run_in_trace_entity(*args, **kwargs):
+        xray_recorder.set_trace_entity(entity)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            xray_recorder.clear_trace_entities()
+
+    return _run_in_trace_entity
+
+
+def _backoff(attempt: int):
+    backoff = min(_BATCH_MAX_BACKOFF_SECONDS, _BATCH_BASE_BACKOFF_SECONDS * 2**attempt)
+    time.sleep(backoff * random.random())
 
 
 class BatchWriteContext:
-    def __init__(self, app: Table):
+    def __init__(self, app: Table, pool_size: int = 4):
         self._table = app
+        self._pool_size = pool_size
         self._put_items: List[DatabaseModel] = []
         self._delete_items: List[DatabaseModel] = []
+        self.put_count = 0
+        self.delete_count = 0
 
     def put(self, item: DatabaseModel):
         self._put_items.append(item)
 
+    def put_all(self, items: Iterable[DatabaseModel]):
+        self._put_items.extend(items)
+
     def delete(self, item: DatabaseModel):
         self._delete_items.append(item)
 
@@ -545,4 +715,6 @@ class BatchWriteContext:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self._table._perform_batch_write(self._put_items, self._delete_items)
+        self._table._perform_batch_write(self._put_items, self._delete_items, pool_size=self._pool_size)
+        self.put_count = len(self._put_items)
+        self.delete_count = len(self._delete_items)
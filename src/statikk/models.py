@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import uuid
-from typing import Optional, List, Any, Set, Type
+from typing import Optional, List, Any, Type, ClassVar, Dict, Tuple, Callable
 
 from boto3.dynamodb.conditions import ComparisonCondition
-from pydantic import BaseModel, model_serializer, model_validator
+from pydantic import BaseModel, ConfigDict, model_serializer, model_validator
 from pydantic.fields import FieldInfo
 from pydantic_core._pydantic_core import PydanticUndefined
 
@@ -13,12 +15,16 @@ from statikk.expressions import DatabaseModelUpdateExpressionBuilder
 
 
 class Key(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     type: Type = str
     default: Optional[Any] = ""
 
 
 class GSI(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str = "main-index"
     hash_key: Key
     sort_key: Key
@@ -26,6 +32,8 @@ class GSI(BaseModel):
 
 
 class KeySchema(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     hash_key: str
     sort_key: Optional[str] = None
 
@@ -47,12 +55,60 @@ class IndexSecondaryKeyField(Index):
     order: Optional[int] = None
 
 
+_ALREADY_BOXED = (dict, Index)
+
+
+async def _run_in_executor(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a blocking table operation on the event loop's default executor. boto3 releases the GIL while it waits on
+    the network, so this allows several DynamoDB round-trips to be in flight at the same time. The operation runs in
+    the caller's X-Ray segment.
+    """
+    from statikk.engine import _bind_trace_entity
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, _bind_trace_entity(functools.partial(func, *args, **kwargs)))
+
+
 class DatabaseModel(BaseModel):
+    _model_type_name: ClassVar[str] = "DatabaseModel"
+    _index_fields: ClassVar[Dict[str, Tuple[Type[Index], Dict[str, Any]]]] = {}
+    _hash_key_field_names: ClassVar[Tuple[str, ...]] = ()
+    _sort_key_field_names: ClassVar[Tuple[str, ...]] = ()
+    _has_custom_validators: ClassVar[bool] = False
+
     id: str
 
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        cls._model_type_name = cls.__name__
+        cls._index_fields = {
+            field_name: (field_info.annotation, cls._index_field_defaults(field_info))
+            for field_name, field_info in cls.model_fields.items()
+            if cls._is_index_field(field_info)
+        }
+        cls._hash_key_field_names = tuple(
+            field_name
+            for field_name, field_info in cls.model_fields.items()
+            if cls._is_index_field(field_info, IndexPrimaryKeyField)
+        )
+        cls._sort_key_field_names = tuple(
+            field_name
+            for field_name, field_info in cls.model_fields.items()
+            if cls._is_index_field(field_info, IndexSecondaryKeyField)
+        )
+        decorators = cls.__pydantic_decorators__
+        cls._has_custom_validators = bool(
+            decorators.validators
+            or decorators.field_validators
+            or decorators.root_validators
+            or decorators.model_validators.keys() - DatabaseModel.__pydantic_decorators__.model_validators.keys()
+        )
+
     @classmethod
     def model_type(cls):
-        return cls.__name__
+        return cls._model_type_name
 
     @classmethod
     def include_type_in_sort_key(cls):
@@ -67,8 +123,8 @@ class DatabaseModel(BaseModel):
         cls._table = table
 
     @classmethod
-    def batch_write(cls):
-        return cls._table.batch_write()
+    def batch_write(cls, pool_size: int = 4):
+        return cls._table.batch_write(pool_size=pool_size)
 
     @classmethod
     def query(
@@ -86,6 +142,22 @@ class DatabaseModel(BaseModel):
             index_name=index_name,
         )
 
+    @classmethod
+    def count(
+        cls,
+        hash_key: Condition,
+        range_key: Optional[Condition] = None,
+        filter_condition: Optional[ComparisonCondition] = None,
+        index_name: Optional[str] = None,
+    ) -> int:
+        return cls._table.count_index(
+            hash_key=hash_key,
+            model_class=cls,
+            range_key=range_key,
+            filter_condition=filter_condition,
+            index_name=index_name,
+        )
+
     def save(self):
         return self._table.put_item(self)
 
@@ -115,8 +187,53 @@ class DatabaseModel(BaseModel):
         return cls._table.get_item(id=id, model_class=cls, sort_key=sort_key, consistent_read=consistent_read)
 
     @classmethod
-    def batch_get(cls, ids: List[str], batch_size: int = 100):
-        return cls._table.batch_get_items(ids=ids, model_class=cls, batch_size=batch_size)
+    def batch_get(cls, ids: List[str], batch_size: int = 100, pool_size: int = 4):
+        return cls._table.batch_get_items(ids=ids, model_class=cls, batch_size=batch_size, pool_size=pool_size)
+
+    @classmethod
+    def from_db(cls, item: Dict[str, Any]) -> DatabaseModel:
+        """
+        Builds a model from trusted data, such as an item read back from the table, without running validation.
+        Raw index field values are boxed into their index types, every other value is used as-is. The item must
+        contain every required field, including the id, with values of the right type already. The given item is not
+        modified.
+        """
+        item = dict(item)
+        for key, (annotation, extra_fields) in cls._index_fields.items():
+            if key in item and not isinstance(item[key], Index):
+                item[key] = annotation(value=item[key], **extra_fields)
+        return cls.model_construct(**item)
+
+    async def asave(self):
+        return await _run_in_executor(self.save)
+
+    @classmethod
+    async def aget(cls, id: str, sort_key: Optional[str] = None, consistent_read: bool = False):
+        return await _run_in_executor(cls.get, id, sort_key=sort_key, consistent_read=consistent_read)
+
+    @classmethod
+    async def aquery(
+        cls,
+        hash_key: Condition,
+        range_key: Optional[Condition] = None,
+        filter_condition: Optional[ComparisonCondition] = None,
+        index_name: Optional[str] = None,
+    ) -> List[DatabaseModel]:
+        def _query():
+            return list(
+                cls.query(
+                    hash_key=hash_key,
+                    range_key=range_key,
+                    filter_condition=filter_condition,
+                    index_name=index_name,
+                )
+            )
+
+        return await _run_in_executor(_query)
+
+    @classmethod
+    async def abatch_get(cls, ids: List[str], batch_size: int = 100, pool_size: int = 4) -> List[DatabaseModel]:
+        return await _run_in_executor(cls.batch_get, ids, batch_size=batch_size, pool_size=pool_size)
 
     @classmethod
     def scan(
@@ -127,23 +244,17 @@ class DatabaseModel(BaseModel):
         return cls._table.scan(model_class=cls, filter_condition=filter_condition)
 
     @staticmethod
-    def _index_types() -> Set[Type[Index]]:
-        return {Index, IndexPrimaryKeyField, IndexSecondaryKeyField}
+    def _is_index_field(field: FieldInfo, index_type: Type[Index] = Index) -> bool:
+        return isinstance(field.annotation, type) and issubclass(field.annotation, index_type)
 
     @staticmethod
-    def _is_index_field(field: FieldInfo) -> bool:
-        index_types = {Index, IndexPrimaryKeyField, IndexSecondaryKeyField}
-        return field.annotation in index_types
-
-    @classmethod
-    def _create_index_field_from_shorthand(cls, field: FieldInfo, value: str) -> FieldInfo:
-        annotation = field.annotation
+    def _index_field_defaults(field: FieldInfo) -> Dict[str, Any]:
         extra_fields = dict()
         if field.default is not PydanticUndefined:
             extra_fields["index_names"] = field.default.index_names
-            if field.annotation is IndexSecondaryKeyField:
+            if issubclass(field.annotation, IndexSecondaryKeyField):
                 extra_fields["order"] = field.default.order
-        return annotation(value=value, **extra_fields)
+        return extra_fields
 
     @model_validator(mode="before")
     @classmethod
@@ -160,23 +271,18 @@ class DatabaseModel(BaseModel):
             if "id" not in data:
                 data["id"] = str(uuid.uuid4())
 
-            for key, value in data.items():
-                field = cls.model_fields[key]
-                if cls._is_index_field(field) and not isinstance(value, dict):
-                    if isinstance(value, tuple(cls._index_types())):
-                        continue
-                    else:
-                        data[key] = cls._create_index_field_from_shorthand(field, value)
+            for key, (annotation, extra_fields) in cls._index_fields.items():
+                if key not in data:
+                    continue
+                value = data[key]
+                if isinstance(value, _ALREADY_BOXED):
+                    continue
+                data[key] = annotation(value=value, **extra_fields)
         return data
 
     @model_validator(mode="after")
     def validate_index_fields(self):
-        sort_key_field_orders = [
-            getattr(self, field_name).order
-            for field_name, field_info in self.model_fields.items()
-            if field_info.annotation is not None
-            if field_info.annotation is IndexSecondaryKeyField
-        ]
+        sort_key_field_orders = [getattr(self, field_name).order for field_name in self._sort_key_field_names]
         have_orders_defined = any([order for order in sort_key_field_orders])
         all_orders_defined = all([order for order in sort_key_field_orders])
         use_default_ordering = all([order is None for order in sort_key_field_orders])
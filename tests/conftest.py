@@ -1,10 +1,24 @@
-"""
-    Dummy conftest.py for statikk.
+import os
 
-    If you don't know what this is for, just leave it empty.
-    Read more about conftest.py under:
-    - https://docs.pytest.org/en/stable/fixture.html
-    - https://docs.pytest.org/en/stable/writing_plugins.html
-"""
+import boto3
+import pytest
+from moto import mock_dynamodb
 
-# import pytest
+
+@pytest.fixture(scope="session")
+def _moto():
+    with mock_dynamodb():
+        yield boto3.resource("dynamodb", region_name=os.environ.get("AWS_DEFAULT_REGION", "eu-west-1"))
+
+
+@pytest.fixture
+def dynamodb(_moto):
+    """
+    The DynamoDB resource of the session-wide moto mock. Tables created during the test are deleted afterwards, so
+    tests can reuse table names without restarting the mock.
+    """
+    existing_tables = {table.name for table in _moto.tables.all()}
+    yield _moto
+    for table in _moto.tables.all():
+        if table.name not in existing_tables:
+            table.delete()
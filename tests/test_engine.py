@@ -1,10 +1,14 @@
+import asyncio
 from _decimal import Decimal
 from datetime import datetime, timezone
-from typing import List
-from pydantic import BaseModel
+from typing import List, Optional
+from unittest.mock import patch
+from pydantic import AfterValidator, BaseModel, Field, ValidationError, field_validator
+from typing_extensions import Annotated
+import boto3
 import pytest
+from aws_xray_sdk.core import xray_recorder
 from boto3.dynamodb.conditions import Attr
-from moto import mock_dynamodb
 
 from statikk.conditions import Equals, BeginsWith
 from statikk.engine import (
@@ -27,7 +31,7 @@ class MyAwesomeModel(DatabaseModel):
     player_id: IndexPrimaryKeyField
     tier: IndexSecondaryKeyField
     name: str = "Foo"
-    values: set = {1, 2, 3, 4}
+    values: set = Field(default_factory=lambda: {1, 2, 3, 4})
     cost: int = 4
     probability: float = 0.5
 
@@ -49,7 +53,7 @@ class MultiIndexModel(DatabaseModel):
 
     card_template_id: IndexPrimaryKeyField = IndexPrimaryKeyField(index_names=["secondary-index"])
     tier: IndexSecondaryKeyField = IndexSecondaryKeyField(index_names=["secondary-index", "main-index"])
-    values: List[int] = [1, 2, 3, 4]
+    values: List[int] = Field(default_factory=lambda: [1, 2, 3, 4])
 
     def include_type_in_sort_key(cls):
         return False
@@ -60,28 +64,135 @@ class SomeOtherIndexModel(DatabaseModel):
     tier: IndexSecondaryKeyField = IndexSecondaryKeyField(index_names=["my-awesome-index"])
 
 
+class UpperCaseNameModel(DatabaseModel):
+    player_id: IndexPrimaryKeyField
+    tier: IndexSecondaryKeyField
+    name: str
+
+    @field_validator("name")
+    @classmethod
+    def upper_case_name(cls, value: str) -> str:
+        return value.upper()
+
+
+class AnnotatedUpperCaseNameModel(DatabaseModel):
+    player_id: IndexPrimaryKeyField
+    tier: IndexSecondaryKeyField
+    name: Annotated[str, AfterValidator(str.upper)]
+
+
+class ShortNameModel(DatabaseModel):
+    player_id: IndexPrimaryKeyField
+    tier: IndexSecondaryKeyField
+    name: str = Field(max_length=3)
+
+
+KEY_SCHEMA = KeySchema(hash_key="id")
+MAIN_INDEX = GSI(name="main-index", hash_key=Key(name="gsi_pk"), sort_key=Key(name="gsi_sk"))
+SECONDARY_INDEX = GSI(name="secondary-index", hash_key=Key(name="gsi_pk_2"), sort_key=Key(name="gsi_sk_2"))
+DATETIME_SECONDARY_INDEX = GSI(
+    name="secondary-index", hash_key=Key(name="gsi_pk_2"), sort_key=Key(name="gsi_sk_2", type=datetime)
+)
+
+
 def _create_dynamodb_table(table):
     table.create(aws_region="eu-west-1")
 
 
-def test_create_my_awesome_model():
-    mock_dynamodb().start()
+def _truncate_dynamodb_table(table):
+    dynamodb_table = table._get_dynamodb_table()
+    scan_params = {"ProjectionExpression": "id"}
+    with dynamodb_table.batch_writer() as batch:
+        while True:
+            response = dynamodb_table.scan(**scan_params)
+            for item in response["Items"]:
+                batch.delete_item(Key={"id": item["id"]})
+            if "LastEvaluatedKey" not in response:
+                break
+            scan_params["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _shared_table(name, indexes, models):
+    """
+    Builds a table that is shared by the tests of this module. It is deleted when the module's tests are done.
+    """
     table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
+        name=name,
+        key_schema=KEY_SCHEMA,
+        indexes=indexes,
+        models=models,
+        session=boto3.Session(region_name="eu-west-1"),
     )
-    _create_dynamodb_table(table)
+    yield table
+    if table.name in table._dynamodb_client().list_tables()["TableNames"]:
+        table.delete()
+
+
+def _empty_shared_table(table):
+    """
+    Rebinds the table's models to it and truncates the table, or creates it again if something dropped it in the
+    meantime.
+    """
+    for model in table.models:
+        model.set_table_ref(table)
+    if table.name in table._dynamodb_client().list_tables()["TableNames"]:
+        _truncate_dynamodb_table(table)
+    else:
+        _create_dynamodb_table(table)
+    return table
+
+
+@pytest.fixture(scope="module")
+def _my_awesome_table_definition(_moto):
+    yield from _shared_table("my-awesome-table", [MAIN_INDEX], [MyAwesomeModel])
+
+
+@pytest.fixture(scope="module")
+def _double_index_table_definition(_moto):
+    yield from _shared_table("double-index-table", [MAIN_INDEX, DATETIME_SECONDARY_INDEX], [DoubleIndexModel])
+
+
+@pytest.fixture(scope="module")
+def _multi_index_table_definition(_moto):
+    yield from _shared_table("multi-index-table", [MAIN_INDEX, SECONDARY_INDEX], [MultiIndexModel])
+
+
+@pytest.fixture(scope="module")
+def _some_other_index_table_definition(_moto):
+    yield from _shared_table(
+        "some-other-index-table",
+        [GSI(name="my-awesome-index", hash_key=Key(name="gsi_pk"), sort_key=Key(name="gsi_sk"))],
+        [SomeOtherIndexModel],
+    )
+
+
+@pytest.fixture
+def my_awesome_table(_my_awesome_table_definition):
+    """An empty table for MyAwesomeModel, indexed by the main index."""
+    return _empty_shared_table(_my_awesome_table_definition)
+
+
+@pytest.fixture
+def double_index_table(_double_index_table_definition):
+    """An empty table for DoubleIndexModel, indexed by the main index and a datetime sorted secondary index."""
+    return _empty_shared_table(_double_index_table_definition)
+
+
+@pytest.fixture
+def multi_index_table(_multi_index_table_definition):
+    """An empty table for MultiIndexModel, indexed by the main and the secondary index."""
+    return _empty_shared_table(_multi_index_table_definition)
+
+
+@pytest.fixture
+def some_other_index_table(_some_other_index_table_definition):
+    """An empty table for SomeOtherIndexModel, indexed by an index that is named differently than the main index."""
+    return _empty_shared_table(_some_other_index_table_definition)
+
+
+def test_create_my_awesome_model(my_awesome_table):
     model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY")
-    table.put_item(model)
-    assert table.get_item(id=model.id, model_class=MyAwesomeModel).model_dump() == {
+    assert my_awesome_table.put_item(model).model_dump() == {
         "id": "foo",
         "player_id": "123",
         "tier": "LEGENDARY",
@@ -94,8 +205,7 @@ def test_create_my_awesome_model():
         "probability": 0.5,
     }
     model_2 = MyAwesomeModel(id="foo-2", player_id="123", tier="EPIC", name="FooFoo")
-    table.put_item(model_2)
-    assert table.get_item(id=model_2.id, model_class=MyAwesomeModel).model_dump() == {
+    assert my_awesome_table.put_item(model_2).model_dump() == {
         "id": "foo-2",
         "player_id": "123",
         "tier": "EPIC",
@@ -107,72 +217,61 @@ def test_create_my_awesome_model():
         "type": "MyAwesomeModel",
         "probability": 0.5,
     }
-    mock_dynamodb().stop()
 
 
-def test_multi_index_table():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            ),
-            GSI(
-                name="secondary-index",
-                hash_key=Key(name="gsi_pk_2"),
-                sort_key=Key(name="gsi_sk_2", type=datetime),
+@pytest.mark.parametrize(
+    "table_fixture, model_class, model_data, expected",
+    [
+        pytest.param(
+            "double_index_table",
+            DoubleIndexModel,
+            dict(
+                id="foo",
+                player_id="123",
+                tier="LEGENDARY",
+                card_template_id="abc",
+                added_at=datetime(2023, 9, 10, 12, 0, 0),
             ),
-        ],
-        models=[DoubleIndexModel],
-    )
-    _create_dynamodb_table(table)
-    my_model = DoubleIndexModel(
-        id="foo",
-        player_id="123",
-        tier="LEGENDARY",
-        card_template_id="abc",
-        added_at=datetime(2023, 9, 10, 12, 0, 0),
-    )
-    table.put_item(my_model)
-    assert table.get_item(id=my_model.id, model_class=DoubleIndexModel).model_dump() == {
-        "id": "foo",
-        "player_id": "123",
-        "tier": "LEGENDARY",
-        "card_template_id": "abc",
-        "added_at": 1694340000,
-        "gsi_pk": "123",
-        "gsi_sk": "DoubleIndexModel|LEGENDARY",
-        "gsi_pk_2": "abc",
-        "gsi_sk_2": datetime(2023, 9, 10, 12, 0),
-        "type": "DoubleIndexModel",
-    }
-    mock_dynamodb().stop()
+            {
+                "id": "foo",
+                "player_id": "123",
+                "tier": "LEGENDARY",
+                "card_template_id": "abc",
+                "added_at": int(datetime(2023, 9, 10, 12, 0, 0).timestamp()),
+                "gsi_pk": "123",
+                "gsi_sk": "DoubleIndexModel|LEGENDARY",
+                "gsi_pk_2": "abc",
+                "gsi_sk_2": datetime(2023, 9, 10, 12, 0),
+                "type": "DoubleIndexModel",
+            },
+            id="double_index_table",
+        ),
+        pytest.param(
+            "multi_index_table",
+            MultiIndexModel,
+            dict(id="card-id", player_id="123", card_template_id="abc", tier="LEGENDARY"),
+            {
+                "card_template_id": "abc",
+                "gsi_pk": "123",
+                "gsi_pk_2": "abc",
+                "gsi_sk": "LEGENDARY",
+                "gsi_sk_2": "LEGENDARY",
+                "id": "card-id",
+                "player_id": "123",
+                "tier": "LEGENDARY",
+                "values": [1, 2, 3, 4],
+                "type": "MultiIndexModel",
+            },
+            id="multi_index_table",
+        ),
+    ],
+)
+def test_index_values_are_written(request, table_fixture, model_class, model_data, expected):
+    table = request.getfixturevalue(table_fixture)
+    assert table.put_item(model_class(**model_data)).model_dump() == expected
 
 
-def test_incorrect_index_type():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            ),
-            GSI(
-                name="secondary-index",
-                hash_key=Key(name="gsi_pk_2"),
-                sort_key=Key(name="gsi_sk_2", type=datetime),
-            ),
-        ],
-        models=[DoubleIndexModel],
-    )
-    _create_dynamodb_table(table)
+def test_incorrect_index_type(double_index_table):
     my_model = DoubleIndexModel(
         id="foo",
         player_id="123",
@@ -182,73 +281,17 @@ def test_incorrect_index_type():
     )
 
     with pytest.raises(IncorrectSortKeyError) as e:
-        table.put_item(my_model)
+        double_index_table.put_item(my_model)
     assert (
         e.value.args[0]
         == f"Incorrect sort key type. Sort key type for sort key 'gsi_sk_2' should be: <class 'datetime.datetime'> but got: <class 'str'>"
     )
 
 
-def test_multi_field_index():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            ),
-            GSI(
-                name="secondary-index",
-                hash_key=Key(name="gsi_pk_2"),
-                sort_key=Key(name="gsi_sk_2"),
-            ),
-        ],
-        models=[MultiIndexModel],
-    )
-    _create_dynamodb_table(table)
+def test_integration_get_item(multi_index_table):
     model = MultiIndexModel(id="card-id", player_id="123", card_template_id="abc", tier="LEGENDARY")
-    table.put_item(model)
-    assert table.get_item(id=model.id, model_class=MultiIndexModel).model_dump() == {
-        "card_template_id": "abc",
-        "gsi_pk": "123",
-        "gsi_pk_2": "abc",
-        "gsi_sk": "LEGENDARY",
-        "gsi_sk_2": "LEGENDARY",
-        "id": "card-id",
-        "player_id": "123",
-        "tier": "LEGENDARY",
-        "values": [1, 2, 3, 4],
-        "type": "MultiIndexModel",
-    }
-    mock_dynamodb().stop()
-
-
-def test_integration_get_item():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            ),
-            GSI(
-                name="secondary-index",
-                hash_key=Key(name="gsi_pk_2"),
-                sort_key=Key(name="gsi_sk_2"),
-            ),
-        ],
-        models=[MultiIndexModel],
-    )
-    _create_dynamodb_table(table)
-    model = MultiIndexModel(id="card-id", player_id="123", card_template_id="abc", tier="LEGENDARY")
-    table.put_item(model)
-    item = table.get_item("card-id", MultiIndexModel)
+    multi_index_table.put_item(model)
+    item = multi_index_table.get_item("card-id", MultiIndexModel)
     assert item.id == model.id
     assert item.player_id == model.player_id
     assert item.card_template_id == model.card_template_id
@@ -257,98 +300,41 @@ def test_integration_get_item():
     assert item.gsi_pk_2 == "abc"
     assert item.gsi_sk == "LEGENDARY"
     assert item.gsi_sk_2 == "LEGENDARY"
-    mock_dynamodb().stop()
 
 
-def test_query_model_index():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
-    model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY", name="Terror From Below")
-    table.put_item(model)
-    model_2 = MyAwesomeModel(id="foo-2", player_id="123", tier="EPIC")
-    table.put_item(model_2)
+@pytest.mark.parametrize(
+    "table_fixture, model_class, index_name",
+    [
+        pytest.param("my_awesome_table", MyAwesomeModel, None, id="default_index"),
+        pytest.param("some_other_index_table", SomeOtherIndexModel, "my-awesome-index", id="index_name_is_provided"),
+    ],
+)
+def test_query_model_index(request, table_fixture, model_class, index_name):
+    table = request.getfixturevalue(table_fixture)
+    model = model_class(id="foo", player_id="123", tier="LEGENDARY")
+    model_2 = model_class(id="foo-2", player_id="123", tier="EPIC")
+    model_3 = model_class(id="foo-3", player_id="123", tier="LEGENDARY")
+    table.put_items([model, model_2, model_3])
     models = list(
         table.query_index(
+            index_name=index_name,
             hash_key=Equals("123"),
             range_key=BeginsWith("LEG"),
-            filter_condition=Attr("name").eq("Terror From Below"),
-            model_class=MyAwesomeModel,
-        )
-    )
-    assert len(models) == 1
-    assert models[0].id == model.id
-    assert models[0].model_type == model.model_type
-    assert models[0].tier == model.tier
-    mock_dynamodb().stop()
-
-
-def test_query_index_name_is_provided():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="my-awesome-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[SomeOtherIndexModel],
-    )
-    _create_dynamodb_table(table)
-    model = SomeOtherIndexModel(id="foo", player_id="123", tier="LEGENDARY")
-    table.put_item(model)
-    model_2 = SomeOtherIndexModel(id="foo-2", player_id="123", tier="EPIC")
-    table.put_item(model_2)
-    models = list(
-        table.query_index(
-            index_name="my-awesome-index",
-            hash_key=Equals("123"),
-            range_key=BeginsWith("SomeOtherIndexModel"),
-            filter_condition=Attr("tier").eq("LEGENDARY"),
-            model_class=SomeOtherIndexModel,
+            filter_condition=Attr("id").eq("foo"),
+            model_class=model_class,
         )
     )
     assert len(models) == 1
     assert models[0].id == model.id
     assert models[0].model_type == model.model_type
     assert models[0].tier == model.tier
-    mock_dynamodb().stop()
 
 
-def test_batch_get_items():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
+def test_batch_get_items(my_awesome_table):
     model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY")
     model_2 = MyAwesomeModel(id="foo-2", player_id="123", tier="LEGENDARY")
-    table.put_item(model)
-    table.put_item(model_2)
-    models = table.batch_get_items(["foo", "foo-2"], MyAwesomeModel, batch_size=1)
+    my_awesome_table.put_items([model, model_2])
+    models = my_awesome_table.batch_get_items(["foo", "foo-2"], MyAwesomeModel, batch_size=1)
     assert len(models) == 2
     assert models[0].id == model.id
     assert models[0].model_type == model.model_type
@@ -356,77 +342,35 @@ def test_batch_get_items():
     assert models[1].id == model_2.id
     assert models[1].model_type == model_2.model_type
     assert models[1].tier == model_2.tier
-    mock_dynamodb().stop()
 
 
-def test_batch_write():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
-
-    with table.batch_write() as batch:
-        for i in range(30):
-            model = MyAwesomeModel(id=f"foo_{i}", player_id="123", tier="LEGENDARY")
-            batch.put(model)
+def test_batch_write(my_awesome_table):
+    models = [MyAwesomeModel(id=f"foo_{i}", player_id="123", tier="LEGENDARY") for i in range(30)]
+    with my_awesome_table.batch_write() as batch:
+        batch.put_all(models)
+    assert batch.put_count == 30
 
-    models = list(
-        table.query_index(
+    assert (
+        my_awesome_table.count_index(
             index_name="main-index",
             hash_key=Equals("123"),
-            range_key=BeginsWith("MyAwesomeModel"),
-            filter_condition=Attr("tier").eq("LEGENDARY"),
+            range_key=BeginsWith("LEGENDARY"),
             model_class=MyAwesomeModel,
         )
+        == 30
     )
-    assert len(models) == 30
 
-    with table.batch_write() as batch:
+    with my_awesome_table.batch_write() as batch:
         for model in models:
             batch.delete(model)
-
-    models = list(
-        table.query_index(
-            index_name="main-index",
-            hash_key=Equals("123"),
-            range_key=BeginsWith("MyAwesomeModel"),
-            filter_condition=Attr("tier").eq("LEGENDARY"),
-            model_class=MyAwesomeModel,
-        )
-    )
-    assert len(models) == 0
-
-    mock_dynamodb().stop()
+    assert batch.delete_count == 30
+    assert my_awesome_table.count_index(hash_key=Equals("123"), model_class=MyAwesomeModel) == 0
 
 
-def test_query_index_does_not_exist():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
+def test_query_index_does_not_exist(my_awesome_table):
     with pytest.raises(InvalidIndexNameError) as e:
         list(
-            table.query_index(
+            my_awesome_table.query_index(
                 hash_key=Equals("123"),
                 range_key=BeginsWith("foo"),
                 index_name="does-not-exist",
@@ -434,30 +378,16 @@ def test_query_index_does_not_exist():
             )
         )
     assert e.value.args[0] == "The provided index name 'does-not-exist' is not configured on the table."
-    mock_dynamodb().stop()
 
 
-def test_table_delegates():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
+def test_table_delegates(my_awesome_table):
     model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY").save()
     saved_model = MyAwesomeModel.get(model.id)
     assert model == saved_model
     models = list(MyAwesomeModel.query(hash_key=Equals("123")))
     assert len(models) == 1
     assert models[0] == model
+    assert MyAwesomeModel.count(hash_key=Equals("123")) == 1
     model_2 = MyAwesomeModel(id="foo-2", player_id="123", tier="bar")
     model_3 = MyAwesomeModel(id="foo-3", player_id="123", tier="bar")
     with MyAwesomeModel.batch_write() as batch:
@@ -473,6 +403,7 @@ def test_table_delegates():
     assert saved_models[2] == model_3
 
 
+@pytest.mark.usefixtures("dynamodb")
 def test_exclude_type_from_sort_key():
     class ExcludeTypeModel(DatabaseModel):
         player_id: IndexPrimaryKeyField
@@ -482,26 +413,19 @@ def test_exclude_type_from_sort_key():
         def include_type_in_sort_key(cls):
             return False
 
-    mock_dynamodb().start()
     table = Table(
         name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
         models=[ExcludeTypeModel],
     )
     _create_dynamodb_table(table)
     model = ExcludeTypeModel(id="foo", player_id="123", tier="LEGENDARY").save()
     saved_model = ExcludeTypeModel.get(model.id)
     assert "ExcludeTypeModel" not in saved_model.gsi_sk
-    mock_dynamodb().stop()
 
 
+@pytest.mark.usefixtures("dynamodb")
 def test_type_is_primary_key():
     class TypeIsPrimaryKeyModel(DatabaseModel):
         tier: IndexSecondaryKeyField = IndexSecondaryKeyField(index_names=["main-index", "secondary-index"])
@@ -519,22 +443,10 @@ def test_type_is_primary_key():
         def model_type(cls):
             return "my-type"
 
-    mock_dynamodb().start()
     table = Table(
         name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            ),
-            GSI(
-                name="secondary-index",
-                hash_key=Key(name="gsi_pk_2"),
-                sort_key=Key(name="gsi_sk_2"),
-            ),
-        ],
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX, SECONDARY_INDEX],
         models=[TypeIsPrimaryKeyModel],
     )
     _create_dynamodb_table(table)
@@ -543,73 +455,24 @@ def test_type_is_primary_key():
     assert model.gsi_sk == "LEGENDARY"
     assert model.gsi_pk_2 == "Bar"
     assert model.gsi_sk_2 == "LEGENDARY"
-    mock_dynamodb().stop()
 
 
-def test_delete_model():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
+def test_delete_model(my_awesome_table):
     model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY")
     model_2 = MyAwesomeModel(id="foo-2", player_id="123", tier="EPIC", name="FooFoo")
     model_3 = MyAwesomeModel(id="foo-3", player_id="123", tier="EPIC", name="FooFooFoo")
-    table.put_item(model)
-    table.put_item(model_2)
-    table.delete_item(model.id)
+    my_awesome_table.put_items([model, model_2])
+    my_awesome_table.delete_item(model.id)
     model_3.delete()
-    assert list(table.query_index("123", MyAwesomeModel)) == [model_2]
+    assert list(my_awesome_table.query_index("123", MyAwesomeModel)) == [model_2]
 
-    mock_dynamodb().stop()
-
-
-def test_get_item_does_not_exist():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
 
+def test_get_item_does_not_exist(my_awesome_table):
     with pytest.raises(ItemNotFoundError) as e:
-        table.get_item("foo", MyAwesomeModel)
-
-    mock_dynamodb().stop()
+        my_awesome_table.get_item("foo", MyAwesomeModel)
 
 
-def test_update():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
+def test_update(my_awesome_table):
     model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY", name="FooFoo", values={1, 2, 3, 4})
     model.save()
     (
@@ -621,7 +484,7 @@ def test_update():
         .add("cost", 1)
         .execute()
     )
-    item = table.get_item("foo", MyAwesomeModel)
+    item = my_awesome_table.get_item("foo", MyAwesomeModel)
     assert item.player_id.value == "456"
     assert item.values == {2, 3, 4}
     assert item.name == "Foo"  # default value
@@ -629,63 +492,39 @@ def test_update():
     assert item.tier.value == "EPIC"
     assert item.gsi_sk == "MyAwesomeModel|EPIC"
     item.update().set("name", "FooFoo").execute()
-    item = table.get_item("foo", MyAwesomeModel)
+    item = my_awesome_table.get_item("foo", MyAwesomeModel)
     assert item.name == "FooFoo"
-    mock_dynamodb().stop()
 
 
-def test_scan():
-    mock_dynamodb().start()
-    table = Table(
-        name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
-        models=[MyAwesomeModel],
-    )
-    _create_dynamodb_table(table)
+def test_scan(my_awesome_table):
     model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY", name="FooFoo", values={1, 2, 3, 4})
     model_2 = MyAwesomeModel(id="foo-2", player_id="123", tier="EPIC", name="BarBar")
-    model.save()
-    model_2.save()
+    my_awesome_table.put_items([model, model_2])
     items = list(MyAwesomeModel.scan())
     assert len(items) == 2
-    mock_dynamodb().stop()
 
 
+@pytest.mark.usefixtures("dynamodb")
 def test_query_no_range_key_provided():
-    mock_dynamodb().start()
     table = Table(
         name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
         models=[MyAwesomeModel, SimpleModel],
     )
     _create_dynamodb_table(table)
     model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY", name="FooFoo", values={1, 2, 3, 4})
-    model.save()
     model_2 = SimpleModel(
         player_id="123",
         board_id="456",
     )
-    model_2.save()
+    table.put_items([model, model_2])
 
     my_awesome_models = list(MyAwesomeModel.query(hash_key=Equals("123")))
     assert len(my_awesome_models) == 1
-    mock_dynamodb().stop()
 
 
+@pytest.mark.usefixtures("dynamodb")
 def test_query_no_range_is_provided_but_model_does_not_include_type_in_range_key():
     class Model(DatabaseModel):
         tier: IndexSecondaryKeyField
@@ -698,17 +537,10 @@ def test_query_no_range_is_provided_but_model_does_not_include_type_in_range_key
         def include_type_in_sort_key(cls):
             return False
 
-    mock_dynamodb().start()
     table = Table(
         name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
         models=[Model],
     )
     _create_dynamodb_table(table)
@@ -721,26 +553,20 @@ def test_query_no_range_is_provided_but_model_does_not_include_type_in_range_key
     assert models[0].gsi_sk == "LEGENDARY"
 
 
+@pytest.mark.usefixtures("dynamodb")
 def test_index_field_order_is_respected():
     class ModelWithIndexOrdersDefined(DatabaseModel):
         player_id: IndexPrimaryKeyField
         unit_class: IndexSecondaryKeyField = IndexSecondaryKeyField(order=2)
         tier: IndexSecondaryKeyField = IndexSecondaryKeyField(order=1)
         name: str = "Foo"
-        values: set = {1, 2, 3, 4}
+        values: set = Field(default_factory=lambda: {1, 2, 3, 4})
         cost: int = 4
 
-    mock_dynamodb().start()
     table = Table(
         name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
         models=[ModelWithIndexOrdersDefined],
     )
     _create_dynamodb_table(table)
@@ -750,16 +576,48 @@ def test_index_field_order_is_respected():
     assert item.gsi_sk == "ModelWithIndexOrdersDefined|EPIC|Mage"
 
 
+@pytest.mark.usefixtures("dynamodb")
+def test_subclassed_index_fields_are_index_fields():
+    class PlayerField(IndexPrimaryKeyField):
+        pass
+
+    class TierField(IndexSecondaryKeyField):
+        pass
+
+    class ModelWithSubclassedIndexFields(DatabaseModel):
+        player_id: PlayerField
+        unit_class: IndexSecondaryKeyField = IndexSecondaryKeyField(order=2)
+        tier: TierField = TierField(order=1)
+
+    table = Table(
+        name="my-dynamodb-table",
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
+        models=[ModelWithSubclassedIndexFields],
+    )
+    _create_dynamodb_table(table)
+    model = ModelWithSubclassedIndexFields(id="123", player_id="456", unit_class="Mage", tier="EPIC")
+    assert isinstance(model.tier, TierField)
+    assert model.tier.order == 1
+    model.save()
+    item = table.get_item("123", ModelWithSubclassedIndexFields)
+    assert item.gsi_pk == "456"
+    assert item.gsi_sk == "ModelWithSubclassedIndexFields|EPIC|Mage"
+
+
+@pytest.mark.usefixtures("dynamodb")
 def test_nested_models():
     class InnerInnerModel(BaseModel):
         baz: str
 
     class InnerModel(BaseModel):
         foo: str
-        values: List[datetime] = [
-            datetime(2023, 9, 9, 12, 0, 0),
-            datetime(2023, 9, 9, 13, 0, 0),
-        ]
+        values: List[datetime] = Field(
+            default_factory=lambda: [
+                datetime(2023, 9, 9, 12, 0, 0),
+                datetime(2023, 9, 9, 13, 0, 0),
+            ]
+        )
         cost: int = 5
         inner_inner: InnerInnerModel
 
@@ -768,21 +626,14 @@ def test_nested_models():
         unit_class: IndexSecondaryKeyField = IndexSecondaryKeyField(order=2)
         tier: IndexSecondaryKeyField = IndexSecondaryKeyField(order=1)
         name: str = "Foo"
-        values: set = {1, 2, 3, 4}
+        values: set = Field(default_factory=lambda: {1, 2, 3, 4})
         cost: int = 4
         inner_model: InnerModel
 
-    mock_dynamodb().start()
     table = Table(
         name="my-dynamodb-table",
-        key_schema=KeySchema(hash_key="id"),
-        indexes=[
-            GSI(
-                name="main-index",
-                hash_key=Key(name="gsi_pk"),
-                sort_key=Key(name="gsi_sk"),
-            )
-        ],
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
         models=[NestedModel],
     )
     _create_dynamodb_table(table)
@@ -806,8 +657,8 @@ def test_nested_models():
         "inner_model": {
             "foo": "bar",
             "values": [
-                datetime(2023, 9, 9, 10, 0, tzinfo=timezone.utc),
-                datetime(2023, 9, 9, 11, 0, tzinfo=timezone.utc),
+                datetime(2023, 9, 9, 12, 0, 0).astimezone(timezone.utc),
+                datetime(2023, 9, 9, 13, 0, 0).astimezone(timezone.utc),
             ],
             "cost": 5,
             "inner_inner": {"baz": "baz"},
@@ -816,3 +667,313 @@ def test_nested_models():
         "gsi_sk": "NestedModel|EPIC|Mage",
         "type": "NestedModel",
     }
+
+
+@pytest.mark.usefixtures("dynamodb")
+def test_string_models_are_not_revalidated_when_read_back():
+    class StringModel(DatabaseModel):
+        player_id: IndexPrimaryKeyField
+        tier: IndexSecondaryKeyField
+        name: str
+
+    table = Table(
+        name="my-dynamodb-table",
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
+        models=[StringModel],
+    )
+    _create_dynamodb_table(table)
+    model = StringModel(id="foo", player_id="123", tier="LEGENDARY", name="Foo").save()
+    with patch.object(StringModel, "__pydantic_validator__") as validator:
+        item = table.get_item("foo", StringModel)
+        models = list(StringModel.query(hash_key=Equals("123")))
+        batch = StringModel.batch_get(["foo"])
+        scanned = list(StringModel.scan())
+    validator.validate_python.assert_not_called()
+    assert item == model
+    assert models == [model]
+    assert batch == [model]
+    assert scanned == [model]
+    assert isinstance(item.player_id, IndexPrimaryKeyField)
+    assert isinstance(item.tier, IndexSecondaryKeyField)
+    assert item.gsi_sk == "StringModel|LEGENDARY"
+    with pytest.raises(ValidationError):
+        StringModel(id="bar", player_id="123", tier="LEGENDARY", name=42)
+
+
+@pytest.mark.usefixtures("dynamodb")
+@pytest.mark.parametrize(
+    "model_class, expected_name",
+    [
+        pytest.param(UpperCaseNameModel, "FOO", id="field_validator"),
+        pytest.param(AnnotatedUpperCaseNameModel, "FOO", id="annotated_validator"),
+        pytest.param(ShortNameModel, "foo", id="field_constraint"),
+    ],
+)
+def test_models_with_own_validators_are_validated_when_read_back(model_class, expected_name):
+    table = Table(
+        name="my-dynamodb-table",
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
+        models=[model_class],
+    )
+    _create_dynamodb_table(table)
+    model_class(id="foo", player_id="123", tier="LEGENDARY", name="foo").save()
+    with patch.object(model_class, "model_construct") as model_construct:
+        item = table.get_item("foo", model_class)
+    model_construct.assert_not_called()
+    assert item.name == expected_name
+
+
+@pytest.mark.usefixtures("dynamodb")
+def test_field_constraints_are_checked_when_read_back():
+    table = Table(
+        name="my-dynamodb-table",
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
+        models=[ShortNameModel],
+    )
+    _create_dynamodb_table(table)
+    table._get_dynamodb_table().put_item(Item={"id": "foo", "player_id": "123", "tier": "LEGENDARY", "name": "toolong"})
+    with pytest.raises(ValidationError):
+        table.get_item("foo", ShortNameModel)
+
+
+def test_async_table_delegates(my_awesome_table):
+    async def _run():
+        saved_models = await asyncio.gather(
+            *[MyAwesomeModel(id=f"foo-{i}", player_id="123", tier="LEGENDARY").asave() for i in range(3)]
+        )
+        model = await MyAwesomeModel.aget("foo-0")
+        models = await MyAwesomeModel.aquery(hash_key=Equals("123"))
+        batch = await MyAwesomeModel.abatch_get(["foo-0", "foo-1", "foo-2"], batch_size=2)
+        return saved_models, model, models, batch
+
+    saved_models, model, models, batch = asyncio.run(_run())
+    assert model == saved_models[0]
+    assert sorted(m.id for m in models) == ["foo-0", "foo-1", "foo-2"]
+    assert [m.id for m in batch] == ["foo-0", "foo-1", "foo-2"]
+
+
+@pytest.mark.usefixtures("dynamodb")
+def test_async_calls_share_one_lazily_built_client():
+    class AsyncModel(DatabaseModel):
+        name: str = "Foo"
+
+    _create_dynamodb_table(Table(name="my-dynamodb-table", key_schema=KEY_SCHEMA, models=[AsyncModel]))
+    table = Table(name="my-dynamodb-table", key_schema=KEY_SCHEMA, models=[AsyncModel])
+
+    async def _run():
+        return await asyncio.gather(*[AsyncModel(id=f"foo-{i}").asave() for i in range(5)])
+
+    with patch.object(table, "_build_dynamodb_table", wraps=table._build_dynamodb_table) as build_dynamodb_table:
+        asyncio.run(_run())
+    build_dynamodb_table.assert_called_once()
+    assert AsyncModel.get("foo-4").name == "Foo"
+
+
+def test_async_calls_are_traced_in_the_callers_segment(my_awesome_table, xray_segment):
+    async def _run():
+        await MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY").asave()
+        return await MyAwesomeModel.aget("foo")
+
+    assert asyncio.run(_run()).id == "foo"
+    operations = [subsegment.aws["operation"] for subsegment in xray_segment.subsegments]
+    assert operations == ["PutItem", "GetItem"]
+
+
+@pytest.mark.usefixtures("dynamodb")
+def test_model_without_sort_key_field_uses_type_as_sort_key():
+    class TypeSortedModel(DatabaseModel):
+        player_id: IndexPrimaryKeyField
+
+    class UnsortedModel(DatabaseModel):
+        player_id: IndexPrimaryKeyField
+
+        @classmethod
+        def include_type_in_sort_key(cls):
+            return False
+
+    table = Table(
+        name="my-dynamodb-table",
+        key_schema=KEY_SCHEMA,
+        indexes=[MAIN_INDEX],
+        models=[TypeSortedModel, UnsortedModel],
+    )
+    _create_dynamodb_table(table)
+    TypeSortedModel(id="foo", player_id="123").save()
+    raw_item = table._get_dynamodb_table().get_item(Key={"id": "foo"})["Item"]
+    assert raw_item["gsi_sk"] == "TypeSortedModel"
+    with pytest.raises(IncorrectSortKeyError) as e:
+        UnsortedModel(id="bar", player_id="123").save()
+    assert e.value.args[0] == f"Model {UnsortedModel} does not have a sort key defined."
+
+
+@pytest.mark.usefixtures("dynamodb")
+def test_table_without_indexes():
+    class PlainModel(DatabaseModel):
+        name: str = "Foo"
+
+    table = Table(name="my-dynamodb-table", key_schema=KEY_SCHEMA, models=[PlainModel])
+    assert table.indexes == []
+    _create_dynamodb_table(table)
+    PlainModel(id="foo", name="Bar").save()
+    assert PlainModel.get("foo").name == "Bar"
+
+
+@pytest.mark.usefixtures("dynamodb")
+def test_fields_are_deserialized_by_their_annotation():
+    class NotedModel(DatabaseModel):
+        note: str = "no datetime yet"
+        added_at: Optional[datetime] = None
+        probability: float = 0.5
+
+    table = Table(name="my-dynamodb-table", key_schema=KEY_SCHEMA, models=[NotedModel])
+    _create_dynamodb_table(table)
+    NotedModel(id="foo", added_at=datetime(2023, 9, 10, 12, 0, 0)).save()
+    item = NotedModel.get("foo")
+    assert item.note == "no datetime yet"
+    assert item.added_at == datetime(2023, 9, 10, 12, 0, 0)
+    assert item.probability == 0.5
+    assert type(item.probability) is float
+
+
+def test_table_uses_the_region_of_its_session(dynamodb):
+    class RegionalModel(DatabaseModel):
+        name: str = "Foo"
+
+    table = Table(
+        name="my-regional-table",
+        key_schema=KEY_SCHEMA,
+        models=[RegionalModel],
+        session=boto3.Session(region_name="us-east-1"),
+    )
+    assert table._dynamodb_client().meta.region_name == "us-east-1"
+    _create_dynamodb_table(table)
+    try:
+        RegionalModel(id="foo", name="Bar").save()
+        assert RegionalModel.get("foo").name == "Bar"
+        assert "my-regional-table" not in [eu_table.name for eu_table in dynamodb.tables.all()]
+    finally:
+        table.delete()
+
+
+def test_writes_do_not_rebuild_the_model_schema(my_awesome_table):
+    model = MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY")
+    with patch.object(MyAwesomeModel, "model_rebuild") as model_rebuild:
+        model.save()
+        with my_awesome_table.batch_write() as batch:
+            batch.put(MyAwesomeModel(id="foo-2", player_id="123", tier="EPIC"))
+    model_rebuild.assert_not_called()
+    assert my_awesome_table.get_item("foo-2", MyAwesomeModel).gsi_sk == "MyAwesomeModel|EPIC"
+
+
+def test_query_and_scan_follow_pagination(my_awesome_table):
+    # DynamoDB pages results at 1MB, so five ~300KB items span two pages.
+    with my_awesome_table.batch_write() as batch:
+        batch.put_all(
+            MyAwesomeModel(id=f"foo_{i}", player_id="123", tier="LEGENDARY", name="x" * 300_000) for i in range(5)
+        )
+    assert sum(1 for _ in MyAwesomeModel.query(hash_key=Equals("123"))) == 5
+    assert sum(1 for _ in MyAwesomeModel.scan()) == 5
+
+
+def test_index_values_are_not_recomposed_when_already_set(my_awesome_table):
+    MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY").save()
+    model = MyAwesomeModel.get("foo")
+    model.name = "Bar"
+    with patch.object(my_awesome_table, "_compose_index_values") as compose_index_values:
+        model.save()
+    compose_index_values.assert_not_called()
+    saved_model = MyAwesomeModel.get("foo")
+    assert saved_model.name == "Bar"
+    assert saved_model.gsi_sk == "MyAwesomeModel|LEGENDARY"
+
+
+def test_batch_write_resends_unprocessed_items(my_awesome_table):
+    client = my_awesome_table._dynamodb_client()
+    batch_write_item = client.batch_write_item
+    calls = []
+
+    def _throttle_last_request(RequestItems):
+        requests = RequestItems[my_awesome_table.name]
+        calls.append(len(requests))
+        if len(calls) > 1:
+            return batch_write_item(RequestItems=RequestItems)
+        batch_write_item(RequestItems={my_awesome_table.name: requests[:-1]})
+        return {"UnprocessedItems": {my_awesome_table.name: requests[-1:]}}
+
+    with patch.object(client, "batch_write_item", side_effect=_throttle_last_request), patch(
+        "statikk.engine.time.sleep"
+    ) as sleep:
+        with my_awesome_table.batch_write() as batch:
+            batch.put_all(MyAwesomeModel(id=f"foo_{i}", player_id="123", tier="LEGENDARY") for i in range(3))
+    assert calls == [3, 1]
+    sleep.assert_called_once()
+    assert sum(1 for _ in MyAwesomeModel.query(hash_key=Equals("123"))) == 3
+
+
+def test_batch_write_keeps_the_last_queued_version_of_an_item(my_awesome_table):
+    client = my_awesome_table._dynamodb_client()
+    with patch.object(client, "batch_write_item", wraps=client.batch_write_item) as batch_write_item:
+        with my_awesome_table.batch_write() as batch:
+            batch.put(MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY", name="First"))
+            batch.put_all(MyAwesomeModel(id=f"foo_{i}", player_id="123", tier="LEGENDARY") for i in range(30))
+            batch.put(MyAwesomeModel(id="foo", player_id="123", tier="LEGENDARY", name="Last"))
+            batch.delete(MyAwesomeModel(id="foo_0", player_id="123", tier="LEGENDARY"))
+            batch.delete(MyAwesomeModel(id="foo_0", player_id="123", tier="LEGENDARY"))
+    requests = [
+        request
+        for call in batch_write_item.call_args_list
+        for request in call.kwargs["RequestItems"][my_awesome_table.name]
+    ]
+    put_items = [request["PutRequest"]["Item"] for request in requests if "PutRequest" in request]
+    assert len(put_items) == 31
+    assert [item["name"] for item in put_items if item["id"] == "foo"] == ["Last"]
+    assert sum(1 for request in requests if "DeleteRequest" in request) == 1
+    assert my_awesome_table.get_item("foo", MyAwesomeModel).name == "Last"
+    assert my_awesome_table.count_index(hash_key=Equals("123"), model_class=MyAwesomeModel) == 30
+
+
+@pytest.fixture
+def xray_segment():
+    """An open, sampled X-Ray segment. Any DynamoDB call made outside of it raises."""
+    context_missing = xray_recorder.context.context_missing
+    xray_recorder.configure(context_missing="RUNTIME_ERROR")
+    segment = xray_recorder.begin_segment("statikk-tests", sampling=1)
+    yield segment
+    xray_recorder.clear_trace_entities()
+    xray_recorder.configure(context_missing=context_missing)
+
+
+def test_batch_operations_are_traced_in_the_callers_segment(my_awesome_table, xray_segment):
+    my_awesome_table.put_items([MyAwesomeModel(id=f"foo_{i}", player_id="123", tier="LEGENDARY") for i in range(30)])
+    models = MyAwesomeModel.batch_get([f"foo_{i}" for i in range(30)], batch_size=10)
+    assert len(models) == 30
+    operations = [subsegment.aws["operation"] for subsegment in xray_segment.subsegments]
+    assert operations.count("BatchWriteItem") == 2
+    assert operations.count("BatchGetItem") == 3
+
+
+def test_batch_get_items_requests_unprocessed_keys_again(my_awesome_table):
+    my_awesome_table.put_items([MyAwesomeModel(id=f"foo_{i}", player_id="123", tier="LEGENDARY") for i in range(3)])
+    client = my_awesome_table._dynamodb_client()
+    batch_get_item = client.batch_get_item
+    calls = []
+
+    def _throttle_last_key(RequestItems):
+        keys = RequestItems[my_awesome_table.name]["Keys"]
+        calls.append(len(keys))
+        if len(calls) > 1:
+            return batch_get_item(RequestItems=RequestItems)
+        response = batch_get_item(RequestItems={my_awesome_table.name: {"Keys": keys[:-1]}})
+        response["UnprocessedKeys"] = {my_awesome_table.name: {"Keys": keys[-1:]}}
+        return response
+
+    with patch.object(client, "batch_get_item", side_effect=_throttle_last_key), patch(
+        "statikk.engine.time.sleep"
+    ) as sleep:
+        models = my_awesome_table.batch_get_items(["foo_0", "foo_1", "foo_2"], MyAwesomeModel)
+    assert calls == [3, 1]
+    sleep.assert_called_once()
+    assert sorted(model.id for model in models) == ["foo_0", "foo_1", "foo_2"]
@@ -1,6 +1,4 @@
-import boto3
 import pytest
-from moto import mock_dynamodb
 
 from statikk.expressions import (
     UpdateExpressionBuilder,
@@ -20,16 +18,13 @@ class MyModel(DatabaseModel):
 
 # A fixture to create a mock DynamoDB table
 @pytest.fixture
-def create_mocked_table():
-    with mock_dynamodb():
-        dynamodb = boto3.resource("dynamodb", region_name="us-west-2")
-        dynamodb.create_table(
-            TableName="TestTable",
-            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
-            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
-            ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
-        )
-        yield
+def create_mocked_table(dynamodb):
+    dynamodb.create_table(
+        TableName="TestTable",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        ProvisionedThroughput={"ReadCapacityUnits": 1, "WriteCapacityUnits": 1},
+    )
 
 
 def test_set_method(create_mocked_table):
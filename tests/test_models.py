@@ -7,6 +7,9 @@ from statikk.models import (
     DatabaseModel,
     IndexPrimaryKeyField,
     IndexSecondaryKeyField,
+    Key,
+    GSI,
+    KeySchema,
 )
 
 
@@ -64,3 +67,33 @@ def test_same_order_defined_on_fields():
 
     with pytest.raises(ValidationError):
         SameOrderDefinedOnFields(player_id="abc", unit_class="foo", tier="bar")
+
+
+def test_table_configuration_models_are_immutable():
+    key = Key(name="gsi_pk")
+    gsi = GSI(hash_key=key, sort_key=Key(name="gsi_sk"))
+    key_schema = KeySchema(hash_key="id")
+    with pytest.raises(ValidationError):
+        key.name = "other"
+    with pytest.raises(ValidationError):
+        gsi.name = "other-index"
+    with pytest.raises(ValidationError):
+        key_schema.hash_key = "other"
+    assert {gsi, GSI(hash_key=Key(name="gsi_pk"), sort_key=Key(name="gsi_sk"))} == {gsi}
+
+
+def test_from_db_boxes_index_fields_without_validation():
+    class FromDbModel(DatabaseModel):
+        player_id: IndexPrimaryKeyField
+        tier: IndexSecondaryKeyField = IndexSecondaryKeyField(index_names=["secondary-index"], order=1)
+        cost: int = 4
+
+    item = {"id": "foo", "player_id": "123", "tier": "LEGENDARY"}
+    with patch.object(FromDbModel, "__pydantic_validator__") as validator:
+        model = FromDbModel.from_db(item)
+    validator.validate_python.assert_not_called()
+    assert item == {"id": "foo", "player_id": "123", "tier": "LEGENDARY"}
+    assert model.id == "foo"
+    assert model.player_id == IndexPrimaryKeyField(value="123")
+    assert model.tier == IndexSecondaryKeyField(value="LEGENDARY", index_names=["secondary-index"], order=1)
+    assert model.cost == 4